@@ -1,5 +1,14 @@
 import numpy as np
-from typing import Callable, Optional
+from typing import Callable, Optional, Tuple
+from summary_testing.statistical_tests.quantile_sketch import (
+    HistogramQuantileSketch,
+    interval_quantiles,
+    jackknife_acceleration,
+)
+
+# minimum number of resamples used to set the sketch grid when no sketch_range is given
+PILOT_SIZE = 1000
+
 
 def paired_bootstrap_ci(
     x: np.ndarray,
@@ -8,7 +17,13 @@ def paired_bootstrap_ci(
     n_bootstrap: int = 10000,
     ci_level: float = 0.95,
     seed: int = 42,
-    additional_uncertainty: Optional = None
+    additional_uncertainty: Optional = None,
+    ci_method: str = "percentile",
+    use_sketch: bool = False,
+    sketch_range: Optional[Tuple[float, float]] = None,
+    n_bins: int = 2000,
+    batch_size: int = 10000,
+    return_sketch: bool = False,
 ) -> dict:
     """
     Computes the paired bootstrap confidence interval for the difference between two related samples.
@@ -21,14 +36,29 @@ def paired_bootstrap_ci(
         ci_level (float, optional): The confidence level for the interval. Defaults to 0.95.
         seed (int, optional): The random seed for reproducibility. Defaults to 42.
         additional_uncertainty (Optional[dict], optional): A dictionary containing additional uncertainty information with keys "x" and "y". Defaults to None.
+        ci_method (str, optional): Either "percentile" or "bca" (bias-corrected and accelerated). Defaults to "percentile".
+        use_sketch (bool, optional): Accumulate the bootstrap statistics into a fixed-size HistogramQuantileSketch instead of storing them all. Defaults to False.
+        sketch_range (Optional[Tuple[float, float]], optional): The (lower, upper) grid of the sketch. Pass the same range to parallel workers so their sketches can be merged. If None, the grid is set from a pilot of at least 1000 resamples, independent of batch_size. Interval bounds outside the grid are unreliable and raise a warning. Defaults to None.
+        n_bins (int, optional): The number of bins in the sketch grid. Defaults to 2000.
+        batch_size (int, optional): The number of bootstrap statistics buffered before each sketch update. Defaults to 10000.
+        return_sketch (bool, optional): Include the sketch in the results, e.g. to merge across workers. Defaults to False.
 
     Returns:
         dict: A dictionary containing the observed test statistic, the confidence interval, and the bootstrap statistics.
+            With use_sketch, the bootstrap statistics are replaced by their count, mean and standard deviation.
     """
+    if ci_method not in ("percentile", "bca"):
+        raise ValueError(f"Unknown confidence interval method: {ci_method}")
+    if use_sketch and batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+
     paired_differences = y - x
     observed_statistic = difference_statistic(paired_differences)
     n_pairs = len(paired_differences)
     bootstrap_stats = []
+    sketch = None
+    # without a sketch_range, the grid needs a pilot large enough to cover the distribution
+    pilot_size = min(n_bootstrap, max(batch_size, PILOT_SIZE))
     random_state = np.random.RandomState(seed)
 
     # if the two distributions have different uncertainties
@@ -62,10 +92,58 @@ def paired_bootstrap_ci(
         bootstrap_mean = difference_statistic(bootstrap_sample)
         bootstrap_stats.append(bootstrap_mean)
 
+        # flush the buffered statistics into the sketch so memory stays bounded
+        if sketch is None and sketch_range is None:
+            flush_size = pilot_size
+        else:
+            flush_size = batch_size
+        if use_sketch and len(bootstrap_stats) == flush_size:
+            sketch = _update_sketch(
+                sketch, bootstrap_stats, sketch_range, n_bins, observed_statistic
+            )
+            bootstrap_stats = []
+
+    if use_sketch and bootstrap_stats:
+        sketch = _update_sketch(
+            sketch, bootstrap_stats, sketch_range, n_bins, observed_statistic
+        )
+        bootstrap_stats = []
+
     # Calculate confidence interval
-    alpha = 1 - ci_level
-    ci_lower = np.percentile(bootstrap_stats, alpha / 2 * 100)
-    ci_upper = np.percentile(bootstrap_stats, (1 - alpha / 2) * 100)
+    if ci_method == "bca":
+        acceleration = jackknife_acceleration(paired_differences, difference_statistic)
+    else:
+        acceleration = 0.0
+
+    if use_sketch:
+        if sketch is None:
+            raise ValueError(
+                "Cannot compute a confidence interval from an empty sketch, n_bootstrap must be at least 1"
+            )
+        ci_lower, ci_upper = sketch.confidence_interval(
+            ci_level=ci_level,
+            method=ci_method,
+            acceleration=acceleration,
+        )
+        results = {
+            "test_statistic": observed_statistic,
+            "confidence_interval": (ci_lower, ci_upper),
+            "n_bootstrap": sketch.count,
+            "bootstrap_mean": sketch.mean,
+            "bootstrap_std": sketch.std,
+        }
+        if return_sketch:
+            results["bootstrap_sketch"] = sketch
+        return results
+
+    fraction_below = None
+    if ci_method == "bca":
+        fraction_below = np.mean(np.asarray(bootstrap_stats) < observed_statistic)
+    q_lower, q_upper = interval_quantiles(
+        ci_level, n_bootstrap, fraction_below, acceleration
+    )
+    ci_lower = np.percentile(bootstrap_stats, q_lower * 100)
+    ci_upper = np.percentile(bootstrap_stats, q_upper * 100)
 
     return {
         "test_statistic": observed_statistic,
@@ -74,6 +152,27 @@ def paired_bootstrap_ci(
     }
 
 
+def _update_sketch(
+    sketch: Optional[HistogramQuantileSketch],
+    batch: list,
+    sketch_range: Optional[Tuple[float, float]],
+    n_bins: int,
+    observed_statistic: float,
+) -> HistogramQuantileSketch:
+    # the first batch decides the grid unless one was given
+    if sketch is None:
+        if sketch_range is not None:
+            sketch = HistogramQuantileSketch(
+                *sketch_range, n_bins=n_bins, observed_statistic=observed_statistic
+            )
+        else:
+            sketch = HistogramQuantileSketch.from_pilot(
+                batch, n_bins=n_bins, observed_statistic=observed_statistic
+            )
+    sketch.update(np.asarray(batch))
+    return sketch
+
+
 
 def interpret_bootstrap_ci_intervals(statistic, ci_lower, ci_upper):
     print(
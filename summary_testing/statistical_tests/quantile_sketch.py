@@ -0,0 +1,334 @@
+import warnings
+import numpy as np
+from scipy.stats import norm
+from typing import Callable, Optional, Tuple
+
+# below this many bins across the observed range, quantiles are too coarse to trust
+MIN_BINS_ACROSS_RANGE = 50
+
+
+class HistogramQuantileSketch:
+    """
+    A mergeable fixed-grid histogram for streaming bootstrap statistics.
+
+    Values are binned onto a fixed grid, so memory does not grow with the number of
+    resamples. Values outside the grid are counted in underflow / overflow tails and
+    the running mean and variance are tracked exactly. Two sketches built on the same
+    grid (e.g. by parallel workers with different seeds) can be merged.
+
+    If an observed statistic is given, the number of values below it is counted exactly
+    so that BCa intervals do not depend on the binning.
+
+    Attributes:
+        lower (float): The lower edge of the histogram grid.
+        upper (float): The upper edge of the histogram grid.
+        n_bins (int): The number of bins in the histogram grid.
+        observed_statistic (Optional[float]): The statistic on the original sample, if given.
+    """
+
+    def __init__(
+        self,
+        lower: float,
+        upper: float,
+        n_bins: int = 2000,
+        observed_statistic: Optional[float] = None,
+    ) -> None:
+        """
+        Initializes an empty sketch on the grid [lower, upper].
+
+        Args:
+            lower (float): The lower edge of the histogram grid.
+            upper (float): The upper edge of the histogram grid.
+            n_bins (int, optional): The number of bins in the grid. Defaults to 2000.
+            observed_statistic (Optional[float], optional): The statistic on the original sample. Required for BCa intervals. Defaults to None.
+        """
+        if not upper > lower:
+            raise ValueError("upper must be greater than lower")
+        if n_bins < 1:
+            raise ValueError("n_bins must be at least 1")
+        self._edges: np.ndarray = np.linspace(lower, upper, n_bins + 1)
+        self._counts: np.ndarray = np.zeros(n_bins, dtype=np.int64)
+        self._underflow: int = 0
+        self._overflow: int = 0
+        self._count: int = 0
+        self._mean: float = 0.0
+        self._m2: float = 0.0
+        self._min: float = np.inf
+        self._max: float = -np.inf
+        self._observed_statistic: Optional[float] = observed_statistic
+        self._n_below: int = 0
+
+    @classmethod
+    def from_pilot(
+        cls,
+        pilot_stats: np.ndarray,
+        n_bins: int = 2000,
+        padding: float = 1.0,
+        observed_statistic: Optional[float] = None,
+    ) -> "HistogramQuantileSketch":
+        """
+        Builds a sketch whose grid covers a pilot batch of statistics, widened on each side.
+
+        Args:
+            pilot_stats (np.ndarray): An initial batch of bootstrap statistics.
+            n_bins (int, optional): The number of bins in the grid. Defaults to 2000.
+            padding (float, optional): How far to widen the grid on each side, as a fraction of the pilot range. Defaults to 1.0.
+            observed_statistic (Optional[float], optional): The statistic on the original sample. Required for BCa intervals. Defaults to None.
+
+        Returns:
+            HistogramQuantileSketch: An empty sketch. The pilot statistics are not added.
+        """
+        pilot_stats = np.asarray(pilot_stats, dtype=float)
+        lower, upper = float(np.min(pilot_stats)), float(np.max(pilot_stats))
+        spread = upper - lower
+        # a constant pilot gives no scale, so use a small fraction of its magnitude
+        if spread == 0:
+            spread = abs(lower) * 1e-3 if lower != 0 else 1.0
+        return cls(
+            lower - padding * spread,
+            upper + padding * spread,
+            n_bins=n_bins,
+            observed_statistic=observed_statistic,
+        )
+
+    @property
+    def lower(self) -> float:
+        return float(self._edges[0])
+
+    @property
+    def upper(self) -> float:
+        return float(self._edges[-1])
+
+    @property
+    def n_bins(self) -> int:
+        return len(self._counts)
+
+    @property
+    def observed_statistic(self) -> Optional[float]:
+        return self._observed_statistic
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def std(self) -> float:
+        if self._count < 2:
+            return 0.0
+        return float(np.sqrt(self._m2 / (self._count - 1)))
+
+    def update(self, values: np.ndarray) -> None:
+        """
+        Adds a batch of statistics to the sketch.
+
+        Args:
+            values (np.ndarray): The bootstrap statistics to add.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        if values.size == 0:
+            return
+
+        below = values < self.lower
+        above = values > self.upper
+        self._underflow += int(below.sum())
+        self._overflow += int(above.sum())
+        inside = values[~(below | above)]
+        bin_index = np.searchsorted(self._edges, inside, side="right") - 1
+        # the upper edge itself belongs to the last bin
+        bin_index = np.clip(bin_index, 0, self.n_bins - 1)
+        self._counts += np.bincount(bin_index, minlength=self.n_bins)
+        if self._observed_statistic is not None:
+            self._n_below += int((values < self._observed_statistic).sum())
+
+        batch_mean = float(values.mean())
+        self._combine_moments(
+            values.size, batch_mean, float(((values - batch_mean) ** 2).sum())
+        )
+        self._min = min(self._min, float(values.min()))
+        self._max = max(self._max, float(values.max()))
+
+    def merge(self, other: "HistogramQuantileSketch") -> "HistogramQuantileSketch":
+        """
+        Merges another sketch built on the same grid into this one.
+
+        Args:
+            other (HistogramQuantileSketch): The sketch to merge in.
+
+        Returns:
+            HistogramQuantileSketch: This sketch, for chaining.
+        """
+        if not np.array_equal(self._edges, other._edges):
+            raise ValueError("Can only merge sketches built on the same grid")
+        if self._observed_statistic != other._observed_statistic:
+            raise ValueError("Can only merge sketches with the same observed statistic")
+        self._counts += other._counts
+        self._underflow += other._underflow
+        self._overflow += other._overflow
+        self._n_below += other._n_below
+        self._combine_moments(other._count, other._mean, other._m2)
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        return self
+
+    def _combine_moments(self, n: int, mean: float, m2: float) -> None:
+        # Chan et al. parallel update of the running mean and sum of squared deviations
+        if n == 0:
+            return
+        total = self._count + n
+        delta = mean - self._mean
+        self._mean += delta * n / total
+        self._m2 += m2 + delta**2 * self._count * n / total
+        self._count = total
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile of the accumulated statistics.
+
+        Quantiles that fall in the mass outside the grid are only interpolated between the
+        grid edge and the observed extreme, so they are unreliable and a warning is raised.
+        A warning is also raised when the observed range covers so few bins that the grid
+        is too coarse to resolve quantiles.
+
+        Args:
+            q (float): The quantile to estimate, between 0 and 1.
+
+        Returns:
+            float: The estimated quantile.
+        """
+        if self._count == 0:
+            raise ValueError("Cannot compute a quantile of an empty sketch")
+        if q <= 0:
+            return self._min
+        if q >= 1:
+            return self._max
+
+        bin_width = self._edges[1] - self._edges[0]
+        bins_across_range = (self._max - self._min) / bin_width
+        if 0 < bins_across_range < MIN_BINS_ACROSS_RANGE:
+            warnings.warn(
+                f"The observed values span only {bins_across_range:.1f} bins of the sketch "
+                "grid, so quantiles are unreliable. Use a narrower grid or more bins.",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+
+        target = q * self._count
+        # spread the tail mass between the observed extremes and the grid
+        if target <= self._underflow:
+            _warn_outside_grid(q)
+            fraction = target / self._underflow
+            return float(self._min + fraction * (self.lower - self._min))
+        cumulative = self._underflow + np.cumsum(self._counts)
+        if target > cumulative[-1]:
+            _warn_outside_grid(q)
+            fraction = (target - cumulative[-1]) / self._overflow
+            return float(self.upper + fraction * (self._max - self.upper))
+
+        # invert the CDF inside the first bin whose cumulative count reaches the target
+        i = int(np.searchsorted(cumulative, target, side="left"))
+        fraction = (target - (cumulative[i] - self._counts[i])) / self._counts[i]
+        value = self._edges[i] + fraction * (self._edges[i + 1] - self._edges[i])
+        return float(np.clip(value, self._min, self._max))
+
+    def confidence_interval(
+        self,
+        ci_level: float = 0.95,
+        method: str = "percentile",
+        acceleration: float = 0.0,
+    ) -> Tuple[float, float]:
+        """
+        Computes a bootstrap confidence interval from the sketch.
+
+        Bounds that fall outside the sketch grid, or on a grid too coarse for the observed
+        range, are unreliable and raise a warning.
+
+        Args:
+            ci_level (float, optional): The confidence level for the interval. Defaults to 0.95.
+            method (str, optional): Either "percentile" or "bca". "bca" requires the sketch to be built with an observed statistic. Defaults to "percentile".
+            acceleration (float, optional): The BCa acceleration, see `jackknife_acceleration`. Defaults to 0.
+
+        Returns:
+            Tuple[float, float]: The lower and upper bounds of the interval.
+        """
+        if method == "bca":
+            if self._observed_statistic is None:
+                raise ValueError("BCa intervals need a sketch built with an observed_statistic")
+            fraction_below = self._n_below / self._count
+        elif method == "percentile":
+            fraction_below = None
+        else:
+            raise ValueError(f"Unknown confidence interval method: {method}")
+
+        q_lower, q_upper = interval_quantiles(
+            ci_level, self._count, fraction_below, acceleration
+        )
+        return self.quantile(q_lower), self.quantile(q_upper)
+
+
+def _warn_outside_grid(q: float) -> None:
+    warnings.warn(
+        f"The {q:.4f} quantile falls outside the sketch grid and is unreliable. "
+        "Use a wider grid.",
+        RuntimeWarning,
+        stacklevel=3,
+    )
+
+
+def interval_quantiles(
+    ci_level: float,
+    n_bootstrap: int,
+    fraction_below: Optional[float] = None,
+    acceleration: float = 0.0,
+) -> Tuple[float, float]:
+    """
+    Computes the bootstrap distribution quantiles that bound a confidence interval.
+
+    Args:
+        ci_level (float): The confidence level for the interval.
+        n_bootstrap (int): The number of bootstrap resamples.
+        fraction_below (Optional[float], optional): The fraction of bootstrap statistics below the observed statistic. If given, BCa quantiles are returned, otherwise percentile quantiles. Defaults to None.
+        acceleration (float, optional): The BCa acceleration, see `jackknife_acceleration`. Defaults to 0.
+
+    Returns:
+        Tuple[float, float]: The lower and upper quantiles, between 0 and 1.
+    """
+    alpha = 1 - ci_level
+    q_lower, q_upper = alpha / 2, 1 - alpha / 2
+    if fraction_below is None:
+        return q_lower, q_upper
+
+    # keep the bias correction finite when the observed statistic is in the tails
+    eps = 0.5 / n_bootstrap
+    z0 = norm.ppf(np.clip(fraction_below, eps, 1 - eps))
+    z_lower, z_upper = norm.ppf(q_lower), norm.ppf(q_upper)
+    q_lower = norm.cdf(z0 + (z0 + z_lower) / (1 - acceleration * (z0 + z_lower)))
+    q_upper = norm.cdf(z0 + (z0 + z_upper) / (1 - acceleration * (z0 + z_upper)))
+    return float(q_lower), float(q_upper)
+
+
+def jackknife_acceleration(
+    sample: np.ndarray, statistic: Callable[[np.ndarray], float]
+) -> float:
+    """
+    Estimates the BCa acceleration constant from leave-one-out jackknife statistics.
+
+    Args:
+        sample (np.ndarray): The original sample the bootstrap resamples from.
+        statistic (Callable[[np.ndarray], float]): The statistic of interest.
+
+    Returns:
+        float: The acceleration constant.
+    """
+    n = len(sample)
+    jackknife_stats = np.array(
+        [statistic(np.delete(sample, i)) for i in range(n)], dtype=float
+    )
+    deviations = jackknife_stats.mean() - jackknife_stats
+    denominator = 6 * (deviations**2).sum() ** 1.5
+    if denominator == 0:
+        return 0.0
+    return float((deviations**3).sum() / denominator)
@@ -0,0 +1,213 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from summary_testing.statistical_tests.bootstrap import paired_bootstrap_ci
+from summary_testing.statistical_tests.quantile_sketch import HistogramQuantileSketch
+
+
+def _bin_width(sketch):
+    return (sketch.upper - sketch.lower) / sketch.n_bins
+
+
+def _assert_close_to_exact(sketch_bound, exact_bound, exact_stats, tolerance):
+    # on lattice-valued statistics the exact bound may interpolate across a gap, so any
+    # value between the neighbouring order statistics is an equally valid quantile
+    exact_stats = np.asarray(exact_stats)
+    below = exact_stats[exact_stats <= exact_bound].max()
+    above = exact_stats[exact_stats >= exact_bound].min()
+    assert below - tolerance <= sketch_bound <= above + tolerance
+
+
+def _paired_samples(integer_scores=False):
+    random_state = np.random.RandomState(0)
+    if integer_scores:
+        x = random_state.randint(0, 10, 60).astype(float)
+        return x, x + random_state.randint(-2, 5, 60)
+    x = random_state.normal(50, 10, 200)
+    return x, x + random_state.exponential(3, 200)
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        np.concatenate((np.zeros(50), np.full(50, 10.0))),
+        np.random.RandomState(1).normal(0, 1, 5000),
+    ],
+    ids=["lattice", "continuous"],
+)
+def test_quantile_matches_percentile(values):
+    sketch = HistogramQuantileSketch.from_pilot(values, n_bins=1200)
+    sketch.update(values)
+    for q in [0.1, 0.25, 0.4, 0.6, 0.75, 0.9]:
+        assert sketch.quantile(q) == pytest.approx(
+            np.percentile(values, q * 100), abs=_bin_width(sketch)
+        )
+
+
+@pytest.mark.parametrize("ci_method", ["percentile", "bca"])
+@pytest.mark.parametrize(
+    "integer_scores, statistic",
+    [(False, np.mean), (True, np.median)],
+    ids=["mean", "median"],
+)
+def test_sketch_interval_matches_exact(ci_method, integer_scores, statistic):
+    x, y = _paired_samples(integer_scores)
+    exact = paired_bootstrap_ci(x, y, statistic, n_bootstrap=5000, ci_method=ci_method)
+    for batch_size in [100, 10000]:
+        sketched = paired_bootstrap_ci(
+            x,
+            y,
+            statistic,
+            n_bootstrap=5000,
+            ci_method=ci_method,
+            use_sketch=True,
+            batch_size=batch_size,
+            return_sketch=True,
+        )
+        tolerance = _bin_width(sketched["bootstrap_sketch"])
+        for sketch_bound, exact_bound in zip(
+            sketched["confidence_interval"], exact["confidence_interval"]
+        ):
+            _assert_close_to_exact(
+                sketch_bound, exact_bound, exact["bootstrap_stats"], tolerance
+            )
+        assert sketched["n_bootstrap"] == 5000
+        assert sketched["bootstrap_mean"] == pytest.approx(
+            np.mean(exact["bootstrap_stats"])
+        )
+        assert sketched["bootstrap_std"] == pytest.approx(
+            np.std(exact["bootstrap_stats"], ddof=1)
+        )
+
+
+def test_merge_equals_single_sketch():
+    random_state = np.random.RandomState(2)
+    first, second = random_state.normal(0, 1, 3000), random_state.normal(0.5, 2, 2000)
+    sketches = [
+        HistogramQuantileSketch(-10, 10, n_bins=500, observed_statistic=0.1)
+        for _ in range(3)
+    ]
+    sketches[0].update(first)
+    sketches[1].update(second)
+    sketches[2].update(np.concatenate((first, second)))
+    merged = sketches[0].merge(sketches[1])
+
+    combined = np.concatenate((first, second))
+    assert merged.count == sketches[2].count == len(combined)
+    assert merged.mean == pytest.approx(np.mean(combined))
+    assert merged.std == pytest.approx(np.std(combined, ddof=1))
+    assert merged.confidence_interval(method="bca", acceleration=0.05) == pytest.approx(
+        sketches[2].confidence_interval(method="bca", acceleration=0.05)
+    )
+    for q in [0.001, 0.1, 0.5, 0.9, 0.999]:
+        assert merged.quantile(q) == pytest.approx(sketches[2].quantile(q))
+
+
+def test_merge_rejects_different_grids():
+    with pytest.raises(ValueError):
+        HistogramQuantileSketch(0, 1).merge(HistogramQuantileSketch(0, 2))
+    with pytest.raises(ValueError):
+        HistogramQuantileSketch(0, 1, observed_statistic=0.5).merge(
+            HistogramQuantileSketch(0, 1, observed_statistic=0.6)
+        )
+
+
+def test_quantile_outside_grid_warns():
+    values = np.linspace(-2, 12, 1401)
+    sketch = HistogramQuantileSketch(0, 10, n_bins=100)
+    sketch.update(values)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert sketch.quantile(0.5) == pytest.approx(np.percentile(values, 50), abs=0.1)
+    with pytest.warns(RuntimeWarning):
+        lower = sketch.quantile(0.05)
+    with pytest.warns(RuntimeWarning):
+        upper = sketch.quantile(0.95)
+    # tail quantiles stay between the observed extremes and the grid edges
+    assert -2 <= lower <= 0
+    assert 10 <= upper <= 12
+    assert sketch.quantile(0) == -2
+    assert sketch.quantile(1) == 12
+
+
+def test_coarse_grid_warns():
+    values = np.random.RandomState(4).normal(1000, 0.05, 5000)
+    sketch = HistogramQuantileSketch(0, 2000, n_bins=2000)
+    sketch.update(values)
+    with pytest.warns(RuntimeWarning, match="span only"):
+        sketch.confidence_interval()
+
+
+def test_narrow_sketch_range_warns():
+    x, y = _paired_samples()
+    with pytest.warns(RuntimeWarning):
+        paired_bootstrap_ci(
+            x, y, np.mean, n_bootstrap=1000, use_sketch=True, sketch_range=(3, 10)
+        )
+
+
+def test_invalid_arguments_raise():
+    x, y = _paired_samples()
+    with pytest.raises(ValueError):
+        paired_bootstrap_ci(x, y, np.mean, use_sketch=True, batch_size=0)
+    with pytest.raises(ValueError):
+        paired_bootstrap_ci(x, y, np.mean, n_bootstrap=0, use_sketch=True)
+    with pytest.raises(ValueError):
+        paired_bootstrap_ci(x, y, np.mean, ci_method="basic")
+    with pytest.raises(ValueError):
+        HistogramQuantileSketch(0, 1).quantile(0.5)
+
+    # BCa needs an observed statistic
+    sketch = HistogramQuantileSketch(0, 1)
+    sketch.update([0.5])
+    with pytest.raises(ValueError):
+        sketch.confidence_interval(method="bca")
+
+
+def test_default_output_unchanged():
+    x, y = _paired_samples()
+    n_bootstrap, seed = 2000, 42
+
+    # reference implementation of the original percentile bootstrap
+    paired_differences = y - x
+    random_state = np.random.RandomState(seed)
+    expected_stats = []
+    for _ in range(n_bootstrap):
+        indices = random_state.choice(len(x), size=len(x), replace=True)
+        expected_stats.append(np.mean(paired_differences[indices]))
+
+    results = paired_bootstrap_ci(x, y, np.mean, n_bootstrap=n_bootstrap, seed=seed)
+
+    assert set(results) == {"test_statistic", "confidence_interval", "bootstrap_stats"}
+    assert results["test_statistic"] == np.mean(paired_differences)
+    assert results["bootstrap_stats"] == expected_stats
+    assert results["confidence_interval"] == (
+        np.percentile(expected_stats, 2.5),
+        np.percentile(expected_stats, 97.5),
+    )
+
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+@pytest.mark.parametrize("offset, scale", [(1000.0, 1.0), (1e-5, 1e-6)])
+def test_small_batch_size_matches_exact(batch_size, offset, scale):
+    random_state = np.random.RandomState(3)
+    x = random_state.normal(0, scale, 200)
+    y = x + offset + random_state.normal(0, scale / 2, 200)
+    exact = paired_bootstrap_ci(x, y, np.mean, n_bootstrap=5000)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        sketched = paired_bootstrap_ci(
+            x,
+            y,
+            np.mean,
+            n_bootstrap=5000,
+            use_sketch=True,
+            batch_size=batch_size,
+            return_sketch=True,
+        )
+    assert sketched["confidence_interval"] == pytest.approx(
+        exact["confidence_interval"], abs=_bin_width(sketched["bootstrap_sketch"])
+    )